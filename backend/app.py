@@ -13,13 +13,34 @@ Endpoints:
 Frontend developers: All responses are JSON with clean, predictable keys.
 """
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Literal, Tuple
+from enum import Enum
+import numpy as np
 import pandas as pd
+import hashlib
 import joblib
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+import functools
 import os
+import threading
+import warnings
+
+try:
+    import onnxruntime as ort
+except ImportError:  # Optional: fall back to the scikit-learn model
+    ort = None
+
+try:
+    from numba import njit
+except ImportError:  # Optional: run numeric kernels as plain Python
+    def njit(*args, **kwargs):
+        return lambda func: func
 
 # ---------- FASTAPI APP INITIALIZATION ----------
 
@@ -45,23 +66,46 @@ df = None
 model = None
 crime_cols = None
 feature_cols = None
+feature_matrix = None
+index_map = None
+all_scores = None
+all_risk = None
+onnx_session = None
+onnx_input = None
 
 def load_data_and_model():
     """Load dataset and trained model on server startup"""
-    global df, model, crime_cols, feature_cols
+    global df, model, crime_cols, feature_cols, feature_matrix, index_map, all_scores, all_risk
+    global onnx_session, onnx_input
     
-    # Load dataset
-    df = pd.read_csv("CrimesOnWomenData.csv")
-    if "Unnamed: 0" in df.columns:
-        df = df.drop(columns=["Unnamed: 0"])
+    # Load dataset, preferring the Parquet build (see build_artifacts.py) to
+    # skip CSV parsing. It is only trusted while it is at least as new as the
+    # CSV, so an edited dataset is never shadowed by a stale build. In the
+    # CSV the first column is the saved row index. State is categorical so
+    # comparisons and grouping work on integer codes.
+    csv_path, parquet_path = "CrimesOnWomenData.csv", "CrimesOnWomenData.parquet"
+    if (os.path.exists(parquet_path)
+            and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)):
+        df = pq.read_table(pa.memory_map(parquet_path)).to_pandas()
+    else:
+        df = pd.read_csv(csv_path, engine="pyarrow", index_col=0)
+    df["State"] = df["State"].astype("category")
+
+    # Keep rows ordered by (State, Year) so each state's history is
+    # contiguous and already sorted by year
+    df = df.sort_values(["State", "Year"], ignore_index=True)
 
     # Define crime columns
     crime_cols = ['Rape', 'K&A', 'DD', 'AoW', 'AoM', 'DV', 'WT']
     
-    # Calculate total crimes and ratios
-    df["TotalCrimes"] = df[crime_cols].sum(axis=1)
-    for c in crime_cols:
-        df[c + "_ratio"] = df[c] / df["TotalCrimes"]
+    # Calculate total crimes and ratios in single vectorized passes
+    counts = df[crime_cols].to_numpy()
+    totals = counts.sum(axis=1)
+    df["TotalCrimes"] = totals
+    counts = counts.astype(np.float32)
+    with np.errstate(invalid="ignore"):  # 0/0 -> NaN for rows with no crimes
+        ratios = counts / totals.astype(np.float32)[:, None]
+    df[[c + "_ratio" for c in crime_cols]] = ratios
 
     # Define feature columns for ML model
     feature_cols = [
@@ -71,30 +115,97 @@ def load_data_and_model():
         'AoM_ratio', 'DV_ratio', 'WT_ratio'
     ]
 
+    # Materialize model inputs once (columns in feature_cols order);
+    # (state, year) maps to a row of the matrix
+    feature_matrix = np.column_stack(
+        (df["Year"].to_numpy(dtype=np.float32), counts, ratios)
+    )
+    index_map = {
+        (s, y): i
+        for i, (s, y) in enumerate(zip(df["State"].tolist(), df["Year"].tolist()))
+    }
+    if len(index_map) != len(df):
+        raise ValueError("Dataset has duplicate (State, Year) rows")
+
     # Load trained model
     model = joblib.load("safety_model.pkl")
+
+    # Features reach the model as plain float32 arrays, so check that their
+    # column order matches training, then silence sklearn's per-call warning
+    # about missing feature names
+    trained_cols = getattr(model, "feature_names_in_", None)
+    if trained_cols is not None and list(trained_cols) != feature_cols:
+        raise ValueError(
+            f"Model expects features {list(trained_cols)}, got {feature_cols}"
+        )
+    warnings.filterwarnings(
+        "ignore", message="X does not have valid feature names", category=UserWarning
+    )
+
+    # Rows without any recorded crimes have undefined ratios and can't be scored
+    scorable = np.isfinite(feature_matrix).all(axis=1)
+    x_scorable = feature_matrix[scorable]
+
+    # Prefer the ONNX export when available (see build_artifacts.py)
+    if ort is not None and os.path.exists("safety_model.onnx"):
+        onnx_session = ort.InferenceSession(
+            "safety_model.onnx", providers=["CPUExecutionProvider"]
+        )
+        onnx_input = onnx_session.get_inputs()[0].name
+
+        # Refuse a stale export: it must take the same features and agree
+        # with safety_model.pkl on the historical rows
+        n_inputs = onnx_session.get_inputs()[0].shape[-1]
+        if n_inputs != len(feature_cols):
+            raise ValueError(
+                f"safety_model.onnx expects {n_inputs} features, got {len(feature_cols)}"
+            )
+        if not np.allclose(predict_scores(x_scorable), model.predict(x_scorable), atol=0.05):
+            raise ValueError(
+                "safety_model.onnx does not match safety_model.pkl; "
+                "re-run build_artifacts.py"
+            )
+
+    # Score every historical row in one batch; unscorable rows stay NaN
+    all_scores = np.full(len(feature_matrix), np.nan, dtype=np.float32)
+    all_scores[scorable] = predict_scores(x_scorable)
+    buckets = (all_scores >= 40).astype(np.intp) + (all_scores >= 70)
+    all_risk = np.array(RISK_LEVELS)[buckets].tolist()
     
     print("✅ Data and model loaded successfully")
 
-# Load on startup
-load_data_and_model()
+def predict_scores(x: np.ndarray) -> np.ndarray:
+    """
+    Predict safety scores for a float32 matrix of feature rows
+    Uses ONNX Runtime when the exported model is loaded, else scikit-learn.
+    """
+    if onnx_session is not None:
+        return onnx_session.run(None, {onnx_input: x})[0].ravel()
+    return model.predict(x)
+
+# Risk level per score bucket: < 40 → High, [40, 70) → Medium, ≥ 70 → Low
+RISK_LEVELS = ("High", "Medium", "Low")
 
 def risk_from_score(score: float) -> str:
     """
     Convert numerical safety score to risk level category
     Returns: "Low", "Medium", or "High"
     """
-    if score < 40:
-        return "High"
-    elif score < 70:
-        return "Medium"
-    return "Low"
+    return RISK_LEVELS[int(score >= 40) + int(score >= 70)]
+
+# Load on startup
+load_data_and_model()
 
 # ---------- PYDANTIC MODELS FOR REQUEST/RESPONSE ----------
 
+# Valid inputs are fixed by the dataset, so Pydantic rejects anything else
+# before a handler runs
+StateEnum = Enum("StateEnum", {s: s for s in df["State"].unique()}, type=str)
+CrimeType = Literal['Rape', 'K&A', 'DD', 'AoW', 'AoM', 'DV', 'WT']
+
 class SafetyRequest(BaseModel):
     """Request model for safety score by state and year"""
-    state: str = Field(..., description="State name (e.g., 'Tamil Nadu')")
+    state: StateEnum = Field(..., description="State name (e.g., 'Tamil Nadu')")
     year: int = Field(..., ge=2001, le=2025, description="Year (2001-2025)")
     
     class Config:
@@ -112,16 +223,20 @@ class SafetyResponse(BaseModel):
     safety_score: float = Field(..., description="Safety score (0-100)")
     risk_level: str = Field(..., description="Risk level: Low, Medium, or High")
 
+# Upper bound per simulated crime count: far above any yearly count in the
+# dataset, and small enough that each count is exact in the float32 features
+MAX_CRIME_COUNT = 10_000_000
+
 class SimulateRequest(BaseModel):
     """Request model for what-if crime simulation"""
     year: int = Field(..., ge=2001, le=2025, description="Year for simulation")
-    rape: int = Field(..., ge=0, description="Rape cases")
-    kidnapping: int = Field(..., ge=0, description="Kidnapping & Abduction cases")
-    dowry_deaths: int = Field(..., ge=0, description="Dowry death cases")
-    assault_on_women: int = Field(..., ge=0, description="Assault on Women cases")
-    assault_on_minors: int = Field(..., ge=0, description="Assault on Minors cases")
-    domestic_violence: int = Field(..., ge=0, description="Domestic Violence cases")
-    trafficking: int = Field(..., ge=0, description="Women Trafficking cases")
+    rape: int = Field(..., ge=0, le=MAX_CRIME_COUNT, description="Rape cases")
+    kidnapping: int = Field(..., ge=0, le=MAX_CRIME_COUNT, description="Kidnapping & Abduction cases")
+    dowry_deaths: int = Field(..., ge=0, le=MAX_CRIME_COUNT, description="Dowry death cases")
+    assault_on_women: int = Field(..., ge=0, le=MAX_CRIME_COUNT, description="Assault on Women cases")
+    assault_on_minors: int = Field(..., ge=0, le=MAX_CRIME_COUNT, description="Assault on Minors cases")
+    domestic_violence: int = Field(..., ge=0, le=MAX_CRIME_COUNT, description="Domestic Violence cases")
+    trafficking: int = Field(..., ge=0, le=MAX_CRIME_COUNT, description="Women Trafficking cases")
     
     class Config:
         json_schema_extra = {
@@ -158,70 +273,197 @@ class LeaderboardEntry(BaseModel):
     state: str
     score: float
 
+# ---------- PRECOMPUTE RESPONSES ON STARTUP ----------
+
+# (JSON body, ETag) pairs derived from the (immutable) dataset, keyed for
+# direct lookup
+leaderboard_responses = None
+trend_responses = None
+
+def with_etag(body: bytes) -> Tuple[bytes, str]:
+    """Pair a serialized JSON body with its content-hash ETag"""
+    return body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+def build_leaderboard(frame: pd.DataFrame) -> List[LeaderboardEntry]:
+    """Rank states by average total crimes (lowest = safest)"""
+    series = frame.groupby("State", observed=True)["TotalCrimes"].mean().sort_values()
+    return [
+        LeaderboardEntry(state=s, score=round(float(v), 2))
+        for s, v in zip(series.index.to_numpy(), series.to_numpy())
+    ]
+
+def build_precomputed_responses():
+    """Build per-request lookup tables once the dataset and models are ready"""
+    global leaderboard_responses, trend_responses
+
+    # One leaderboard per year, plus the all-years aggregate under None
+    leaderboards = {
+        int(y): build_leaderboard(df[df["Year"] == y])
+        for y in df["Year"].unique()
+    }
+    leaderboards[None] = build_leaderboard(df)
+    leaderboard_responses = {
+        year: with_etag(orjson.dumps([entry.model_dump() for entry in entries]))
+        for year, entries in leaderboards.items()
+    }
+
+    # Year-ordered trend points for every (state, crime) pair
+    trend_responses = {}
+    for state, g in df.groupby("State", observed=True, sort=False):
+        years = g["Year"].to_numpy()
+        trend_responses[state] = {
+            crime: with_etag(orjson.dumps(TrendResponse(
+                state=state,
+                crime=crime,
+                data=[
+                    TrendDataPoint(year=int(y), value=float(v))
+                    for y, v in zip(years, g[crime].to_numpy())
+                ]
+            ).model_dump()))
+            for crime in crime_cols
+        }
+
+build_precomputed_responses()
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag
+    Accepts comma-separated lists, weak W/"..." tags and "*".
+    """
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == "*" or tag == etag:
+            return True
+    return False
+
+def cached_json_response(request: Request, cached: Tuple[bytes, str]) -> Response:
+    """
+    Serve a precomputed JSON body with its ETag
+    Returns 304 Not Modified when the client already holds this version.
+    """
+    body, etag = cached
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=3600"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 # ---------- API ENDPOINTS ----------
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """
     Health check endpoint
     Returns server status
     """
     return {"status": "ok"}
 
-@app.post("/predict/safety", response_model=SafetyResponse)
-def predict_safety(request: SafetyRequest):
+@app.post("/predict/safety", responses={200: {"model": SafetyResponse}})
+async def predict_safety(request: SafetyRequest):
     """
     Predict safety score for a given state and year based on existing data
     
     This endpoint looks up historical crime data and returns the ML-predicted
     safety score for the specified state and year.
     """
-    try:
-        # Find matching row in dataset
-        row = df[(df["State"] == request.state) & (df["Year"] == request.year)]
-        
-        if row.empty:
-            raise HTTPException(
-                status_code=404,
-                detail=f"No data found for state '{request.state}' and year {request.year}"
-            )
-        
-        row = row.iloc[0]
-        
-        # Prepare features for model prediction
-        x = pd.DataFrame([{
-            "Year": row["Year"],
-            "Rape": row["Rape"],
-            "K&A": row["K&A"],
-            "DD": row["DD"],
-            "AoW": row["AoW"],
-            "AoM": row["AoM"],
-            "DV": row["DV"],
-            "WT": row["WT"],
-            "Rape_ratio": row["Rape_ratio"],
-            "K&A_ratio": row["K&A_ratio"],
-            "DD_ratio": row["DD_ratio"],
-            "AoW_ratio": row["AoW_ratio"],
-            "AoM_ratio": row["AoM_ratio"],
-            "DV_ratio": row["DV_ratio"],
-            "WT_ratio": row["WT_ratio"],
-        }])
-        
-        # Predict safety score
-        score = float(model.predict(x)[0])
-        risk = risk_from_score(score)
-        
-        return SafetyResponse(
-            state=request.state,
-            year=request.year,
-            safety_score=round(score, 2),
-            risk_level=risk
+    state = request.state.value
+    i = index_map.get((state, request.year))
+    
+    if i is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No data found for state '{state}' and year {request.year}"
         )
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+    
+    # Scores were predicted for every row at startup
+    score = float(all_scores[i])
+    
+    if np.isnan(score):
+        raise HTTPException(
+            status_code=500,
+            detail=f"Prediction error: no crimes recorded for state '{state}' and year {request.year}"
+        )
+    
+    # Already well-typed; returned as a plain dict to skip response validation
+    return {
+        "state": state,
+        "year": request.year,
+        "safety_score": round(score, 2),
+        "risk_level": all_risk[i]
+    }
+
+# Simulations run in threadpool workers, so each thread owns its input row
+_simulate_local = threading.local()
+
+def _simulate_buffer() -> np.ndarray:
+    """Return this thread's preallocated (1, n_features) float32 input row"""
+    buf = getattr(_simulate_local, "buf", None)
+    if buf is None:
+        buf = _simulate_local.buf = np.empty((1, len(feature_cols)), dtype=np.float32)
+    return buf
+
+@njit(cache=True)
+def build_features(year, rape, kidnapping, dowry_deaths, assault_on_women,
+                   assault_on_minors, domestic_violence, trafficking, inv, out):
+    """
+    Write year, crime counts and crime ratios into out (feature_cols order)
+    inv is 1 / total crimes, computed by the caller with Python integers.
+    """
+    out[0] = year
+    out[1] = rape
+    out[2] = kidnapping
+    out[3] = dowry_deaths
+    out[4] = assault_on_women
+    out[5] = assault_on_minors
+    out[6] = domestic_violence
+    out[7] = trafficking
+    out[8] = rape * inv
+    out[9] = kidnapping * inv
+    out[10] = dowry_deaths * inv
+    out[11] = assault_on_women * inv
+    out[12] = assault_on_minors * inv
+    out[13] = domestic_violence * inv
+    out[14] = trafficking * inv
+
+@functools.lru_cache(maxsize=16384)
+def _simulate(year: int, rape: int, kidnapping: int, dowry_deaths: int,
+              assault_on_women: int, assault_on_minors: int,
+              domestic_violence: int, trafficking: int) -> Tuple[float, str]:
+    """
+    Predict the rounded safety score and risk level for custom crime counts
+    Callers must ensure at least one count is non-zero.
+
+    Pure function of its inputs, so repeated what-if queries are memoized.
+    """
+    total = (
+        rape + kidnapping + dowry_deaths + assault_on_women +
+        assault_on_minors + domestic_violence + trafficking
+    )
+    
+    # Fill this thread's feature row in place
+    x_sim = _simulate_buffer()
+    build_features(
+        year, rape, kidnapping, dowry_deaths, assault_on_women,
+        assault_on_minors, domestic_violence, trafficking, 1.0 / total, x_sim[0]
+    )
+    
+    score = float(predict_scores(x_sim)[0])
+    return round(score, 2), risk_from_score(score)
+
+def warm_up_simulation():
+    """
+    Run the simulate path once on a dummy row at startup
+    Compiles build_features (when numba is installed) and warms the
+    single-row predict, so the first real request skips one-time setup.
+    """
+    x_sim = _simulate_buffer()
+    build_features(2001, 1, 0, 0, 0, 0, 0, 0, 1.0, x_sim[0])
+    predict_scores(x_sim)
+
+warm_up_simulation()
 
 @app.post("/predict/simulate", response_model=SimulateResponse)
 def simulate_safety(request: SimulateRequest):
@@ -245,40 +487,16 @@ def simulate_safety(request: SimulateRequest):
                 detail="At least one crime count must be greater than 0"
             )
         
-        # Calculate crime ratios
-        rape_r = request.rape / total
-        ka_r = request.kidnapping / total
-        dd_r = request.dowry_deaths / total
-        aow_r = request.assault_on_women / total
-        aom_r = request.assault_on_minors / total
-        dv_r = request.domestic_violence / total
-        wt_r = request.trafficking / total
-        
-        # Prepare features for model prediction
-        x_sim = pd.DataFrame([{
-            "Year": request.year,
-            "Rape": request.rape,
-            "K&A": request.kidnapping,
-            "DD": request.dowry_deaths,
-            "AoW": request.assault_on_women,
-            "AoM": request.assault_on_minors,
-            "DV": request.domestic_violence,
-            "WT": request.trafficking,
-            "Rape_ratio": rape_r,
-            "K&A_ratio": ka_r,
-            "DD_ratio": dd_r,
-            "AoW_ratio": aow_r,
-            "AoM_ratio": aom_r,
-            "DV_ratio": dv_r,
-            "WT_ratio": wt_r,
-        }])
-        
-        # Predict safety score
-        score = float(model.predict(x_sim)[0])
-        risk = risk_from_score(score)
+        # Sync endpoint: FastAPI runs it in the threadpool, off the event loop
+        score, risk = _simulate(
+            request.year, request.rape, request.kidnapping,
+            request.dowry_deaths, request.assault_on_women,
+            request.assault_on_minors, request.domestic_violence,
+            request.trafficking
+        )
         
         return SimulateResponse(
-            safety_score=round(score, 2),
+            safety_score=score,
             risk_level=risk
         )
         
@@ -287,97 +505,52 @@ def simulate_safety(request: SimulateRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Simulation error: {str(e)}")
 
-@app.get("/trends", response_model=TrendResponse)
-def get_crime_trends(
+@app.get("/trends", responses={200: {"model": TrendResponse}})
+async def get_crime_trends(
+    request: Request,
     state: str = Query(..., description="State name"),
-    crime: str = Query(..., description="Crime type: Rape, K&A, DD, AoW, AoM, DV, or WT")
+    crime: CrimeType = Query(..., description="Crime type: Rape, K&A, DD, AoW, AoM, DV, or WT")
 ):
     """
     Get crime trends over years for a specific state and crime type
     
     Returns historical data showing how a particular crime has changed over time.
     """
-    try:
-        # Validate crime type
-        valid_crimes = ['Rape', 'K&A', 'DD', 'AoW', 'AoM', 'DV', 'WT']
-        if crime not in valid_crimes:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid crime type. Must be one of: {', '.join(valid_crimes)}"
-            )
-        
-        # Filter data by state
-        state_data = df[df["State"] == state]
-        
-        if state_data.empty:
-            raise HTTPException(
-                status_code=404,
-                detail=f"No data found for state '{state}'"
-            )
-        
-        # Extract trend data
-        trend_data = state_data[["Year", crime]].sort_values("Year")
-        
-        # Convert to response format
-        data_points = [
-            TrendDataPoint(year=int(row["Year"]), value=float(row[crime]))
-            for _, row in trend_data.iterrows()
-        ]
-        
-        return TrendResponse(
-            state=state,
-            crime=crime,
-            data=data_points
+    state_trends = trend_responses.get(state)
+    
+    if state_trends is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No data found for state '{state}'"
         )
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Trend analysis error: {str(e)}")
+    
+    return cached_json_response(request, state_trends[crime])
 
-@app.get("/leaderboard", response_model=List[LeaderboardEntry])
-def get_leaderboard(year: Optional[int] = Query(None, description="Filter by year (optional)")):
+@app.get("/leaderboard", responses={200: {"model": List[LeaderboardEntry]}})
+async def get_leaderboard(
+    request: Request,
+    year: Optional[int] = Query(None, description="Filter by year (optional)")
+):
     """
     Get states ranked by average safety score
     
     Returns a leaderboard of states ordered by their safety scores (lowest = safest).
     Optionally filter by a specific year.
     """
-    try:
-        # Filter by year if provided
-        if year is not None:
-            filtered_df = df[df["Year"] == year]
-            if filtered_df.empty:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"No data found for year {year}"
-                )
-        else:
-            filtered_df = df
-        
-        # Calculate average total crimes per state
-        leaderboard = (
-            filtered_df.groupby("State")["TotalCrimes"]
-            .mean()
-            .sort_values()
-            .reset_index()
+    cached = leaderboard_responses.get(year)
+    
+    if cached is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No data found for year {year}"
         )
-        
-        # Convert to response format
-        result = [
-            LeaderboardEntry(state=row["State"], score=round(float(row["TotalCrimes"]), 2))
-            for _, row in leaderboard.iterrows()
-        ]
-        
-        return result
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Leaderboard error: {str(e)}")
+    
+    return cached_json_response(request, cached)
 
 # ---------- MAIN ENTRY POINT ----------
 
 if __name__ == "__main__":
+    # Single process for local use. Multi-worker deployments should launch
+    # through uvicorn/gunicorn (see README) so startup work only runs in workers.
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
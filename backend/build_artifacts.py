@@ -0,0 +1,48 @@
+"""
+Build optimized artifacts for the Women Safety AI API
+=====================================================
+Run this once after updating the dataset or retraining:
+
+    python build_artifacts.py
+
+Produces:
+- CrimesOnWomenData.parquet → Parquet copy of the CSV dataset, loaded at
+                              startup instead of parsing the CSV
+- safety_model.onnx         → ONNX export of safety_model.pkl, served through
+                              ONNX Runtime (requires: pip install skl2onnx)
+"""
+
+import joblib
+import pandas as pd
+
+# Year + 7 crime counts + 7 crime ratios (see feature_cols in app.py)
+N_FEATURES = 15
+
+def export_parquet(csv_path: str = "CrimesOnWomenData.csv",
+                   parquet_path: str = "CrimesOnWomenData.parquet"):
+    """Convert the CSV dataset to Parquet (State stored as a category)"""
+    df = pd.read_csv(csv_path, engine="pyarrow", index_col=0)
+    df["State"] = df["State"].astype("category")
+    df.to_parquet(parquet_path)
+    print(f"✅ Exported {csv_path} → {parquet_path}")
+
+def export_onnx(model_path: str = "safety_model.pkl", onnx_path: str = "safety_model.onnx"):
+    """Convert the trained scikit-learn model to ONNX"""
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+
+    model = joblib.load(model_path)
+    onnx_model = convert_sklearn(
+        model,
+        initial_types=[("X", FloatTensorType([None, N_FEATURES]))]
+    )
+    with open(onnx_path, "wb") as f:
+        f.write(onnx_model.SerializeToString())
+    print(f"✅ Exported {model_path} → {onnx_path}")
+
+if __name__ == "__main__":
+    export_parquet()
+    try:
+        export_onnx()
+    except ImportError:
+        print("⚠️ skl2onnx not installed; skipping ONNX export")
@@ -74,7 +74,15 @@ def test_simulate():
             data = response.json()
             has_required_fields = all(k in data for k in ["safety_score", "risk_level"])
             valid_risk = data.get("risk_level") in ["Low", "Medium", "High"]
-            success = has_required_fields and valid_risk
+            
+            # Counts large enough to overflow int64 totals must be rejected
+            overflow = dict(payload, rape=2**62, kidnapping=2**62, dowry_deaths=0,
+                            assault_on_women=0, assault_on_minors=0,
+                            domestic_violence=0, trafficking=1)
+            response = requests.post(f"{BASE_URL}/predict/simulate", json=overflow)
+            rejects_overflow = response.status_code == 422
+            
+            success = has_required_fields and valid_risk and rejects_overflow
             print_test(f"Simulate (Score: {data.get('safety_score', 'N/A')}, Risk: {data.get('risk_level', 'N/A')})", success)
             return success
         else:
@@ -126,13 +134,42 @@ def test_leaderboard():
         print_test(f"Leaderboard (Error: {e})", False)
         return False
 
+def test_etag():
+    """Test ETag / If-None-Match revalidation"""
+    try:
+        response = requests.get(f"{BASE_URL}/leaderboard")
+        etag = response.headers.get("ETag")
+        test1 = response.status_code == 200 and etag is not None
+        
+        # Matching tag → 304 with no body
+        response = requests.get(f"{BASE_URL}/leaderboard", headers={"If-None-Match": etag})
+        test2 = response.status_code == 304 and not response.content
+        
+        # Weak tag inside a list, as sent by caches after compression
+        response = requests.get(
+            f"{BASE_URL}/leaderboard",
+            headers={"If-None-Match": f'"stale", W/{etag}'}
+        )
+        test3 = response.status_code == 304
+        
+        # Non-matching tag → full response
+        response = requests.get(f"{BASE_URL}/leaderboard", headers={"If-None-Match": '"stale"'})
+        test4 = response.status_code == 200
+        
+        success = test1 and test2 and test3 and test4
+        print_test("ETag Revalidation", success)
+        return success
+    except Exception as e:
+        print_test(f"ETag Revalidation (Error: {e})", False)
+        return False
+
 def test_error_handling():
     """Test error handling with invalid inputs"""
     try:
         # Test invalid state
         payload = {"state": "InvalidState", "year": 2021}
         response = requests.post(f"{BASE_URL}/predict/safety", json=payload)
-        test1 = response.status_code == 404
+        test1 = response.status_code == 422
         
         # Test invalid year range
         payload = {"state": "Tamil Nadu", "year": 1990}
@@ -141,7 +178,7 @@ def test_error_handling():
         
         # Test invalid crime type
         response = requests.get(f"{BASE_URL}/trends", params={"state": "Delhi", "crime": "InvalidCrime"})
-        test3 = response.status_code == 400
+        test3 = response.status_code == 422
         
         success = test1 and test2 and test3
         print_test("Error Handling", success)
@@ -162,6 +199,7 @@ def run_all_tests():
         test_simulate,
         test_trends,
         test_leaderboard,
+        test_etag,
         test_error_handling
     ]
     
@@ -56,8 +56,15 @@ export interface LeaderboardEntry {
   score: number;
 }
 
+export interface ValidationErrorItem {
+  loc: (string | number)[];
+  msg: string;
+  type: string;
+}
+
 export interface ApiError {
-  detail: string;
+  // Plain message from the API, or a list of items for 422 validation errors
+  detail: string | ValidationErrorItem[];
 }
 
 // ============================================
@@ -70,6 +77,16 @@ const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 // HELPER FUNCTIONS
 // ============================================
 
+/**
+ * Turn an error response body into a readable message
+ */
+function formatErrorDetail(detail: ApiError['detail']): string {
+  if (Array.isArray(detail)) {
+    return detail.map((item) => item.msg).join('; ');
+  }
+  return detail;
+}
+
 /**
  * Generic fetch wrapper with error handling
  */
@@ -90,7 +107,10 @@ async function apiFetch<T>(
 
     if (!response.ok) {
       const error: ApiError = await response.json();
-      throw new Error(error.detail || `HTTP ${response.status}: ${response.statusText}`);
+      throw new Error(
+        (error.detail && formatErrorDetail(error.detail)) ||
+          `HTTP ${response.status}: ${response.statusText}`
+      );
     }
 
     return await response.json();